@@ -0,0 +1,290 @@
+from config import *
+from game_engine import GameEngine
+from game_objects import TimedBlock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Same order as GameEngine.get_valid_moves, so batched searches visit
+# children in the order the per-state solvers do.
+DIRECTIONS = ('right', 'down', 'left', 'up')
+DELTAS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+# Tile codes; any other character a level uses gets a code after these.
+BASE_TILES = (EMPTY, WALL, MOVABLE, TIMED, PURPLE, GOAL, BARRIER)
+EMPTY_CODE, WALL_CODE, MOVABLE_CODE, TIMED_CODE, PURPLE_CODE, GOAL_CODE, BARRIER_CODE = range(len(BASE_TILES))
+
+PLAYER_BLOCKERS = (WALL_CODE, BARRIER_CODE, TIMED_CODE)
+LIQUID_BLOCKERS = (WALL_CODE, MOVABLE_CODE, TIMED_CODE, PURPLE_CODE, GOAL_CODE)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch_engine needs numpy: pip install numpy")
+
+
+def _neighbours(mask):
+    # Cells 4-adjacent to any True cell of each (H, W) layer.
+    result = np.zeros_like(mask)
+    result[:, 1:, :] |= mask[:, :-1, :]
+    result[:, :-1, :] |= mask[:, 1:, :]
+    result[:, :, 1:] |= mask[:, :, :-1]
+    result[:, :, :-1] |= mask[:, :, 1:]
+    return result
+
+
+class BatchState:
+    # N game states of one level stacked into arrays. The rules mirror
+    # GameEngine with the liquid fast path off; fuzz.py checks the two
+    # against each other through the 'batch' backend.
+
+    def __init__(self, width, height, goal_pos, purple_total, tiles):
+        _require_numpy()
+        self.width = width
+        self.height = height
+        self.goal_pos = goal_pos
+        self.purple_total = purple_total
+        self.tiles = tiles
+
+        self.grid = None
+        self.water = None
+        self.lava = None
+        self.timers = None
+        self.movable_set = None
+        self.player = None
+        self.purple_collected = None
+        self.move_count = None
+        self.game_over = None
+        self.won = None
+
+    def __len__(self):
+        return len(self.player)
+
+    @classmethod
+    def from_engines(cls, engines):
+        first = engines[0]
+        tiles = list(BASE_TILES)
+        codes = {tile: code for code, tile in enumerate(tiles)}
+        for engine in engines:
+            for row in engine.grid:
+                for cell in row:
+                    if cell not in codes:
+                        codes[cell] = len(tiles)
+                        tiles.append(cell)
+
+        batch = cls(first.width, first.height, first.goal_pos, first.purple_total, tiles)
+        count = len(engines)
+        shape = (count, first.height, first.width)
+        batch.grid = np.array([[[codes[cell] for cell in row] for row in engine.grid] for engine in engines],
+                              dtype=np.uint8).reshape(shape)
+        batch.water = np.array([engine.water for engine in engines], dtype=bool).reshape(shape)
+        batch.lava = np.array([engine.lava for engine in engines], dtype=bool).reshape(shape)
+        batch.timers = np.zeros(shape, dtype=np.int16)
+        batch.movable_set = np.zeros(shape, dtype=bool)
+        for index, engine in enumerate(engines):
+            for (row, col), block in engine.timed_blocks.items():
+                batch.timers[index, row, col] = block.turns_remaining
+            for row, col in engine.movable_blocks:
+                batch.movable_set[index, row, col] = True
+        batch.player = np.array([engine.player_pos for engine in engines], dtype=np.int32).reshape(count, 2)
+        batch.purple_collected = np.array([engine.purple_collected for engine in engines], dtype=np.int32)
+        batch.move_count = np.array([engine.move_count for engine in engines], dtype=np.int32)
+        batch.game_over = np.array([engine.game_over for engine in engines], dtype=bool)
+        batch.won = np.array([engine.won for engine in engines], dtype=bool)
+        return batch
+
+    def to_engine(self, index, engine_class=GameEngine):
+        grid = [[self.tiles[code] for code in row] for row in self.grid[index].tolist()]
+        timed_blocks = {}
+        for row, col in zip(*np.nonzero(self.grid[index] == TIMED_CODE)):
+            timed_blocks[(int(row), int(col))] = TimedBlock(int(self.timers[index, row, col]))
+        map_data = {
+            'width': self.width,
+            'height': self.height,
+            'grid': grid,
+            'water': self.water[index].tolist(),
+            'lava': self.lava[index].tolist(),
+            'timed_blocks': timed_blocks,
+            'player_pos': (int(self.player[index, 0]), int(self.player[index, 1])),
+            'goal_pos': self.goal_pos,
+            'purple_total': self.purple_total,
+            'movable_blocks': {(int(row), int(col)) for row, col in zip(*np.nonzero(self.movable_set[index]))},
+        }
+        game = engine_class.from_map_data(map_data)
+        game.move_count = int(self.move_count[index])
+        game.purple_collected = int(self.purple_collected[index])
+        game.game_over = bool(self.game_over[index])
+        game.won = bool(self.won[index])
+        return game
+
+    def take(self, indices):
+        batch = BatchState(self.width, self.height, self.goal_pos, self.purple_total, self.tiles)
+        for name in ('grid', 'water', 'lava', 'timers', 'movable_set', 'player',
+                     'purple_collected', 'move_count', 'game_over', 'won'):
+            setattr(batch, name, getattr(self, name)[indices])
+        return batch
+
+    def step(self, directions):
+        # Applies directions[i] (an index into DIRECTIONS) to state i in place
+        # and returns the mask of states that took a turn.
+        count = len(self)
+        states = np.arange(count)
+        deltas = np.array(DELTAS, dtype=np.int32)[directions]
+        row, col = self.player[:, 0], self.player[:, 1]
+
+        next_row, next_col = row + deltas[:, 0], col + deltas[:, 1]
+        next_inside = (next_row >= 0) & (next_row < self.height) & (next_col >= 0) & (next_col < self.width)
+        next_row_c = np.clip(next_row, 0, self.height - 1)
+        next_col_c = np.clip(next_col, 0, self.width - 1)
+        next_tile = self.grid[states, next_row_c, next_col_c]
+
+        push_row, push_col = next_row + deltas[:, 0], next_col + deltas[:, 1]
+        push_inside = (push_row >= 0) & (push_row < self.height) & (push_col >= 0) & (push_col < self.width)
+        push_row_c = np.clip(push_row, 0, self.height - 1)
+        push_col_c = np.clip(push_col, 0, self.width - 1)
+        push_open = ((self.grid[states, push_row_c, push_col_c] == EMPTY_CODE) |
+                     self.water[states, push_row_c, push_col_c] |
+                     self.lava[states, push_row_c, push_col_c])
+
+        active = ~self.game_over & next_inside
+        at_block = active & (next_tile == MOVABLE_CODE)
+        push = at_block & push_inside & push_open
+        walk = (active & ~at_block & ~np.isin(next_tile, PLAYER_BLOCKERS) &
+                ~((next_tile == GOAL_CODE) & (self.purple_collected < self.purple_total)))
+
+        pushed = np.nonzero(push)[0]
+        if len(pushed):
+            block_at = (pushed, next_row_c[pushed], next_col_c[pushed])
+            block_to = (pushed, push_row_c[pushed], push_col_c[pushed])
+            self.grid[block_at] = EMPTY_CODE
+            self.grid[block_to] = MOVABLE_CODE
+            self.water[block_to] = False
+            self.lava[block_to] = False
+            self.movable_set[block_at] = False
+            self.movable_set[block_to] = True
+
+        moved = push | walk
+        self.player[moved, 0] = next_row[moved]
+        self.player[moved, 1] = next_col[moved]
+
+        collect = walk & (next_tile == PURPLE_CODE)
+        self.purple_collected[collect] += 1
+        self.grid[collect, next_row_c[collect], next_col_c[collect]] = EMPTY_CODE
+        win = walk & (next_tile == GOAL_CODE) & (self.purple_collected >= self.purple_total)
+        self.won[win] = True
+        self.game_over[win] = True
+
+        self._finish_turn(moved)
+        return moved
+
+    def _finish_turn(self, moved):
+        self.move_count[moved] += 1
+        turn = moved[:, None, None]
+
+        timed = (self.grid == TIMED_CODE) & turn
+        self.timers[timed] -= 1
+        expired = timed & (self.timers <= 0)
+        self.grid[expired] = EMPTY_CODE
+        self.timers[expired] = 0
+
+        can_flow = ~np.isin(self.grid, LIQUID_BLOCKERS) & turn
+        water_new = _neighbours(self.water) & can_flow
+        lava_new = _neighbours(self.lava) & can_flow & ~self.water
+        collision = water_new & lava_new
+        self.grid[collision] = WALL_CODE
+        self.movable_set |= collision
+        self.water |= water_new & ~collision
+        self.lava |= lava_new & ~collision
+
+        states = np.nonzero(moved)[0]
+        row, col = self.player[states, 0], self.player[states, 1]
+        dead = self.lava[states, row, col] | (self.grid[states, row, col] == WALL_CODE)
+        self.game_over[states[dead]] = True
+        self.won[states[dead]] = False
+
+    def expand(self):
+        # Every legal child of every state, in get_valid_moves order.
+        # Returns (children, parent index, direction index, keys); a child's
+        # key identifies its state like GameEngine.__eq__ (move_count aside).
+        count = len(self)
+        parents = np.repeat(np.arange(count), len(DIRECTIONS))
+        directions = np.tile(np.arange(len(DIRECTIONS)), count)
+        children = self.take(parents)
+        moved = children.step(directions)
+        keep = np.nonzero(moved)[0]
+        children = children.take(keep)
+        return children, parents[keep], directions[keep], children.keys()
+
+    def keys(self):
+        count = len(self)
+        parts = [
+            self.grid.reshape(count, -1),
+            np.packbits(self.water.reshape(count, -1), axis=1),
+            np.packbits(self.lava.reshape(count, -1), axis=1),
+            np.packbits(self.movable_set.reshape(count, -1), axis=1),
+            self.timers.reshape(count, -1).view(np.uint8),
+            self.player.view(np.uint8).reshape(count, -1),
+            self.purple_collected.view(np.uint8).reshape(count, -1),
+            np.stack([self.game_over, self.won], axis=1).view(np.uint8),
+        ]
+        packed = np.ascontiguousarray(np.concatenate(parts, axis=1))
+        return [row.tobytes() for row in packed]
+
+    def target_distances(self):
+        # Grid distance from each player to the nearest remaining purple, or
+        # to the goal once all are collected, around walls and barriers.
+        # States sharing a target/wall layout share one wavefront.
+        count = len(self)
+        remaining = self.purple_total - self.purple_collected
+        targets = (self.grid == PURPLE_CODE) & (remaining > 0)[:, None, None]
+        if self.goal_pos is not None:
+            goal_row, goal_col = self.goal_pos
+            targets[remaining <= 0, goal_row, goal_col] = True
+        passable = ~np.isin(self.grid, (WALL_CODE, BARRIER_CODE))
+
+        layout = np.concatenate([np.packbits(targets.reshape(count, -1), axis=1),
+                                 np.packbits(passable.reshape(count, -1), axis=1)], axis=1)
+        _, first, inverse = np.unique(layout, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        unique_targets = targets[first]
+        unique_passable = passable[first]
+        distances = np.full(unique_targets.shape, -1, dtype=np.int32)
+        distances[unique_targets] = 0
+        frontier = unique_targets
+        reached = unique_targets.copy()
+        step = 0
+        while frontier.any():
+            step += 1
+            frontier = _neighbours(frontier) & unique_passable & ~reached
+            distances[frontier] = step
+            reached |= frontier
+
+        result = distances[inverse, self.player[:, 0], self.player[:, 1]]
+        return np.where(result < 0, self.width * self.height, result)
+
+
+class SingleBatchEngine:
+    # One-state batch behind the GameEngine interface, so the batched rules
+    # can be fuzzed move by move against the reference engine.
+
+    def __init__(self, map_data):
+        self.batch = BatchState.from_engines([GameEngine.from_map_data(map_data)])
+        self._game = None
+
+    def try_move_player(self, direction):
+        self.batch.step(np.array([DIRECTIONS.index(direction)]))
+        self._game = None
+
+    def as_engine(self):
+        if self._game is None:
+            self._game = self.batch.to_engine(0)
+        return self._game
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.as_engine(), name)
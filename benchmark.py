@@ -0,0 +1,250 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from game_engine import GameEngine
+from level_generator import LevelGenerator
+from map_loader import MapLoader
+import intelligent_search_engine
+
+
+ALGORITHMS = ['BFS', 'DFS', 'UCS', 'A_star']
+DEFAULT_GENERATED = ['32x32']
+DEFAULT_THRESHOLD = 0.15
+
+# metric -> True when a bigger value is better
+METRICS = {
+    'ops_per_sec': True,
+    'nodes_per_sec': True,
+    'wall_time': False,
+    'peak_memory_kb': False,
+}
+
+
+LEVEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def shipped_levels():
+    levels = glob.glob(os.path.join(LEVEL_DIR, 'level*.txt'))
+    return sorted(levels, key=lambda path: int(''.join(filter(str.isdigit, os.path.basename(path)))))
+
+
+def generated_level(size, seed=0):
+    width, height = (int(part) for part in size.split('x'))
+    generator = LevelGenerator(width, height, wall_density=0.2,
+                               water_sources=1, lava_sources=1,
+                               movable_blocks=max(2, width * height // 200),
+                               purples=2, timed_blocks=2, seed=seed)
+    return MapLoader.load_from_string(generator.generate())
+
+
+def load_level(name, seed=0):
+    if name.startswith('gen:'):
+        return GameEngine.from_map_data(generated_level(name[4:], seed))
+    return GameEngine(name)
+
+
+class NodeBudgetExceeded(Exception):
+    pass
+
+
+class NodeCounter:
+    # Counts expansions by wrapping GameEngine.get_valid_moves, which every
+    # solver calls exactly once per popped state. With a budget the wrapped
+    # call raises once it is used up, which aborts the solver.
+
+    def __init__(self, budget=0):
+        self.nodes = 0
+        self.budget = budget
+
+    def __enter__(self):
+        original = GameEngine.get_valid_moves
+        counter = self
+
+        def counting_get_valid_moves(state):
+            counter.nodes += 1
+            if counter.budget and counter.nodes > counter.budget:
+                raise NodeBudgetExceeded()
+            return original(state)
+
+        self._original = original
+        GameEngine.get_valid_moves = counting_get_valid_moves
+        return self
+
+    def __exit__(self, *exc_info):
+        GameEngine.get_valid_moves = self._original
+        return False
+
+
+def _time_ops(operation, items, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            operation(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    count = len(items)
+    return {
+        'ops_per_sec': count / best if best else 0.0,
+        'us_per_op': best / count * 1e6,
+    }
+
+
+def run_micro(level_name, iterations, repeat, seed=0):
+    game = load_level(level_name, seed)
+    moves = game.get_valid_moves() or ['right']
+
+    def fresh_copies():
+        return [game.copy() for _ in range(iterations)]
+
+    results = {
+        'copy': _time_ops(lambda state: state.copy(), [game] * iterations, repeat),
+        'hash': _time_ops(hash, fresh_copies(), repeat),
+        'get_valid_moves': _time_ops(GameEngine.get_valid_moves, [game] * iterations, repeat),
+    }
+
+    best = None
+    for _ in range(repeat):
+        copies = fresh_copies()
+        result = _time_ops(lambda state: state.try_move_player(moves[0]), copies, 1)
+        if best is None or result['ops_per_sec'] > best['ops_per_sec']:
+            best = result
+    results['try_move_player'] = best
+
+    best = None
+    for _ in range(repeat):
+        copies = fresh_copies()
+        result = _time_ops(GameEngine._spread_all_liquids, copies, 1)
+        if best is None or result['ops_per_sec'] > best['ops_per_sec']:
+            best = result
+    results['spread_all_liquids'] = best
+
+    return results
+
+
+def _solve(solver, game, budget):
+    with NodeCounter(budget) as counter, contextlib.redirect_stdout(io.StringIO()):
+        try:
+            moves = solver(game)
+        except NodeBudgetExceeded:
+            moves = None
+    return moves, counter.nodes
+
+
+def run_macro(level_name, algorithm, measure_memory=True, seed=0, budget=0):
+    solver = getattr(intelligent_search_engine, algorithm)
+    game = load_level(level_name, seed)
+
+    start = time.perf_counter()
+    moves, nodes = _solve(solver, game.copy(), budget)
+    wall_time = time.perf_counter() - start
+
+    result = {
+        'wall_time': wall_time,
+        'nodes': nodes,
+        'nodes_per_sec': nodes / wall_time if wall_time else 0.0,
+        'solution_len': len(moves) if moves is not None else None,
+        'budget_exhausted': moves is None,
+    }
+
+    if measure_memory:
+        # Separate run: tracemalloc slows allocation-heavy code too much to time it.
+        tracemalloc.start()
+        _solve(solver, game.copy(), budget)
+        result['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+    return result
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for section in ('micro', 'macro'):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+            for metric, higher_is_better in METRICS.items():
+                if metric not in current or not previous.get(metric):
+                    continue
+                change = (current[metric] - previous[metric]) / previous[metric]
+                if (-change if higher_is_better else change) > threshold:
+                    regressions.append((section, name, metric, previous[metric], current[metric], change))
+    return regressions
+
+
+def _level_label(level_name):
+    return level_name if level_name.startswith('gen:') else os.path.basename(level_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engine and solver hot paths")
+    parser.add_argument('--levels', nargs='*', default=None,
+                        help="level files for the macro benchmarks (default: every shipped level)")
+    parser.add_argument('--generated', nargs='*', default=DEFAULT_GENERATED,
+                        help="sizes of generated levels to add, e.g. 64x64")
+    parser.add_argument('--algorithms', nargs='*', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--micro-level', default=os.path.join(LEVEL_DIR, 'level9.txt'))
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--node-budget', type=int, default=20000,
+                        help="abort a macro solve after this many expansions, 0 for none (default 20000)")
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-macro', action='store_true')
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak memory runs")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--save-baseline', help="write results as the new baseline JSON")
+    parser.add_argument('--baseline', help="compare against this baseline JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change counted as a regression (default 0.15)")
+    args = parser.parse_args()
+
+    results = {'micro': {}, 'macro': {}}
+
+    if not args.skip_micro:
+        micro_levels = [args.micro_level] + [f"gen:{size}" for size in args.generated]
+        for level_name in micro_levels:
+            label = _level_label(level_name)
+            for name, result in run_micro(level_name, args.iterations, args.repeat, args.seed).items():
+                key = f"{label}:{name}"
+                results['micro'][key] = result
+                print(f"{key:40} {result['ops_per_sec']:12.0f} ops/s {result['us_per_op']:10.2f} us/op")
+
+    if not args.skip_macro:
+        levels = args.levels if args.levels is not None else shipped_levels()
+        levels = list(levels) + [f"gen:{size}" for size in args.generated]
+        for level_name in levels:
+            for algorithm in args.algorithms:
+                key = f"{_level_label(level_name)}:{algorithm}"
+                result = run_macro(level_name, algorithm, not args.no_memory, args.seed, args.node_budget)
+                results['macro'][key] = result
+                memory = f"{result['peak_memory_kb']:10.0f} KiB" if 'peak_memory_kb' in result else ''
+                length = 'budget' if result['budget_exhausted'] else f"len {result['solution_len']:4}"
+                print(f"{key:40} {result['wall_time']:9.3f} s {result['nodes']:8} nodes "
+                      f"{result['nodes_per_sec']:10.0f} nodes/s {length:8} {memory}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for section, name, metric, previous, current, change in regressions:
+            print(f"REGRESSION {section} {name} {metric}: {previous:.4g} -> {current:.4g} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
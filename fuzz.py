@@ -0,0 +1,247 @@
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import batch_engine
+from game_engine import GameEngine
+from level_generator import LevelGenerator
+from map_loader import MapLoader
+
+
+DIRECTIONS = ['up', 'down', 'left', 'right']
+LEVEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SNAPSHOT_FIELDS = ('player_pos', 'purple_collected', 'purple_total', 'goal_pos', 'move_count',
+                   'game_over', 'won', 'grid', 'water', 'lava', 'timed_blocks', 'movable_blocks')
+
+
+class ReferenceEngine(GameEngine):
+    # The rules exactly as written: liquids are recomputed every turn.
+    LIQUID_FAST_PATH = False
+
+
+class CopyingEngine:
+    # Plays every move on a fresh copy(), the way the solvers do, so copy()
+    # and the moved state are checked together.
+
+    def __init__(self, map_data):
+        self.game = GameEngine.from_map_data(map_data)
+
+    def try_move_player(self, direction):
+        self.game = self.game.copy()
+        self.game.try_move_player(direction)
+
+    def as_engine(self):
+        return self.game
+
+    def __getattr__(self, name):
+        return getattr(self.game, name)
+
+
+# name -> factory(map_data) returning an object with try_move_player and the
+# GameEngine state attributes; wrappers also give as_engine() so the state
+# key can be checked. Faster engines register themselves here.
+BACKENDS = {
+    'reference': ReferenceEngine.from_map_data,
+    'engine': GameEngine.from_map_data,
+    'copy': CopyingEngine,
+}
+if batch_engine.np is not None:
+    BACKENDS['batch'] = batch_engine.SingleBatchEngine
+
+
+def register_backend(name, factory):
+    BACKENDS[name] = factory
+
+
+def snapshot(game):
+    return {
+        'player_pos': tuple(game.player_pos),
+        'purple_collected': game.purple_collected,
+        'purple_total': game.purple_total,
+        'goal_pos': tuple(game.goal_pos) if game.goal_pos is not None else None,
+        'move_count': game.move_count,
+        'game_over': bool(game.game_over),
+        'won': bool(game.won),
+        'grid': tuple(tuple(row) for row in game.grid),
+        'water': tuple(tuple(bool(cell) for cell in row) for row in game.water),
+        'lava': tuple(tuple(bool(cell) for cell in row) for row in game.lava),
+        'timed_blocks': tuple(sorted((tuple(pos), block.turns_remaining)
+                                     for pos, block in game.timed_blocks.items())),
+        'movable_blocks': tuple(sorted(tuple(pos) for pos in game.movable_blocks)),
+    }
+
+
+def diff_snapshots(expected, actual):
+    return [field for field in SNAPSHOT_FIELDS if expected[field] != actual[field]]
+
+
+def as_engine(game):
+    return game if isinstance(game, GameEngine) else game.as_engine()
+
+
+def key_problems(engine, name):
+    # The solvers dedup states through __eq__ and __hash__, so a state has
+    # to match its own copy() as well as the state it snapshots equal to.
+    duplicate = engine.copy()
+    problems = []
+    if engine != duplicate:
+        problems.append(f"{name} != copy()")
+    if hash(engine) != hash(duplicate):
+        problems.append(f"hash({name}) != hash(copy())")
+    return problems
+
+
+def diff_games(expected_game, actual_game):
+    fields = diff_snapshots(snapshot(expected_game), snapshot(actual_game))
+    if fields:
+        return fields
+    expected, actual = as_engine(expected_game), as_engine(actual_game)
+    fields = key_problems(expected, 'reference') + key_problems(actual, 'candidate')
+    if expected != actual or hash(expected) != hash(actual):
+        fields.append('state key')
+    return fields
+
+
+def run_case(level_text, moves, backend, reference='reference'):
+    # Plays the moves on both engines in lockstep. Returns None when they
+    # agree throughout, else (step, differing fields); step 0 is the loaded
+    # level and an exception in the candidate counts as a divergence.
+    expected_game = BACKENDS[reference](MapLoader.load_from_string(level_text))
+    try:
+        actual_game = BACKENDS[backend](MapLoader.load_from_string(level_text))
+        fields = diff_games(expected_game, actual_game)
+    except Exception as e:
+        return 0, [f"{type(e).__name__}: {e}"]
+    if fields:
+        return 0, fields
+
+    for step, move in enumerate(moves, start=1):
+        expected_game.try_move_player(move)
+        try:
+            actual_game.try_move_player(move)
+            fields = diff_games(expected_game, actual_game)
+        except Exception as e:
+            return step, [f"{type(e).__name__}: {e}"]
+        if fields:
+            return step, fields
+    return None
+
+
+def random_moves(level_text, rng, steps, invalid_rate=0.2):
+    # Mostly moves that are valid for the reference engine, plus some
+    # blocked ones and a few after the game has ended.
+    game = ReferenceEngine.from_map_data(MapLoader.load_from_string(level_text))
+    moves = []
+    for _ in range(steps):
+        valid = game.get_valid_moves()
+        if valid and rng.random() >= invalid_rate:
+            move = rng.choice(valid)
+        else:
+            move = rng.choice(DIRECTIONS)
+        moves.append(move)
+        game.try_move_player(move)
+        if game.game_over and rng.random() < 0.5:
+            break
+    return moves
+
+
+def shrink(level_text, moves, backend, reference='reference'):
+    # Cuts the sequence at the first divergence, then delta-debugs it by
+    # dropping ever smaller chunks while the engines still disagree.
+    failure = run_case(level_text, moves, backend, reference)
+    if failure is None:
+        return moves, None
+    moves = moves[:failure[0]]
+
+    chunk = max(1, len(moves) // 2)
+    while moves:
+        shrunk = False
+        start = 0
+        while start < len(moves):
+            candidate = moves[:start] + moves[start + chunk:]
+            result = run_case(level_text, candidate, backend, reference)
+            if result is not None:
+                moves, failure = candidate[:result[0]], result
+                shrunk = True
+            else:
+                start += chunk
+        if not shrunk:
+            if chunk == 1:
+                break
+            chunk = max(1, chunk // 2)
+    return moves, failure
+
+
+def fuzz_levels(generated_sizes, seed):
+    levels = []
+    for path in sorted(glob.glob(os.path.join(LEVEL_DIR, 'level*.txt'))):
+        with open(path) as f:
+            levels.append((os.path.basename(path), f.read()))
+    for index, size in enumerate(generated_sizes):
+        width, height = (int(part) for part in size.split('x'))
+        generator = LevelGenerator(width, height, wall_density=0.2, water_sources=2, lava_sources=2,
+                                   movable_blocks=max(2, width * height // 40), purples=2,
+                                   timed_blocks=3, timed_turns=(1, 12), seed=seed + index)
+        levels.append((f"gen:{size}:s{seed + index}", generator.generate()))
+    return levels
+
+
+def save_repro(out_dir, backend, level_name, level_text, moves, failure):
+    os.makedirs(out_dir, exist_ok=True)
+    safe_name = level_name.replace(':', '_').replace('.txt', '')
+    path = os.path.join(out_dir, f"{backend}_{safe_name}_{len(moves)}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'backend': backend,
+            'level': level_name,
+            'level_text': level_text,
+            'moves': moves,
+            'step': failure[0],
+            'fields': failure[1],
+        }, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential fuzzing of engine backends against GameEngine")
+    parser.add_argument('--backend', default='copy', help=f"candidate backend ({', '.join(BACKENDS)})")
+    parser.add_argument('--reference', default='reference')
+    parser.add_argument('--cases', type=int, default=50, help="random move sequences per level")
+    parser.add_argument('--steps', type=int, default=80, help="maximum moves per sequence")
+    parser.add_argument('--generated', nargs='*', default=['8x8', '12x12', '20x16'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default='fuzz_failures')
+    parser.add_argument('--max-failures', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.backend not in BACKENDS:
+        parser.error(f"unknown backend '{args.backend}', choose from {', '.join(BACKENDS)}")
+
+    rng = random.Random(args.seed)
+    failures = 0
+    total = 0
+    for level_name, level_text in fuzz_levels(args.generated, args.seed):
+        for _ in range(args.cases):
+            moves = random_moves(level_text, rng, args.steps)
+            total += 1
+            if run_case(level_text, moves, args.backend, args.reference) is None:
+                continue
+            moves, failure = shrink(level_text, moves, args.backend, args.reference)
+            path = save_repro(args.out_dir, args.backend, level_name, level_text, moves, failure)
+            print(f"{level_name}: diverged at step {failure[0]} on {', '.join(failure[1])} "
+                  f"({len(moves)} moves) -> {path}")
+            failures += 1
+            break
+        if failures >= args.max_failures:
+            break
+
+    print(f"{total} sequences, {failures} divergences for backend '{args.backend}'")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,24 @@
-
-import copy
+from collections import deque
 from config import *
+from game_objects import TimedBlock
 from map_loader import MapLoader
 
 
 class GameEngine:
+
+    # Skip the liquid spread once water and lava can no longer move.
+    LIQUID_FAST_PATH = True
     
     def __init__(self, map_file):
-        map_data = MapLoader.load_from_file(map_file)
-        
+        self._load_map_data(MapLoader.load(map_file))
+
+    @classmethod
+    def from_map_data(cls, map_data):
+        game = cls.__new__(cls)
+        game._load_map_data(map_data)
+        return game
+
+    def _load_map_data(self, map_data):
         self.width = map_data['width']
         self.height = map_data['height']
         self.grid = map_data['grid']
@@ -25,6 +35,10 @@ class GameEngine:
         self.purple_collected = 0
         self.game_over = False
         self.won = False
+
+        self.liquids_settled = False
+        self._liquid_key = None
+        self._goal_distances = None
     
     def is_position_valid(self, row, col):
         return 0 <= row < self.height and 0 <= col < self.width
@@ -106,6 +120,9 @@ class GameEngine:
             self.lava[push_row][push_col] = False
             self.movable_blocks.remove((block_row, block_col))
             self.movable_blocks.add((push_row, push_col))
+            if self.liquids_settled:
+                self._liquid_key = None
+                self._unsettle_if_near_liquid(block_row, block_col)
             return True
         
         return False
@@ -116,6 +133,8 @@ class GameEngine:
         if cell == PURPLE:
             self.purple_collected += 1
             self.grid[row][col] = EMPTY
+            if self.liquids_settled:
+                self._unsettle_if_near_liquid(row, col)
         
         if cell == GOAL and self.purple_collected >= self.purple_total:
             self.won = True
@@ -140,10 +159,20 @@ class GameEngine:
             del self.timed_blocks[pos]
     
     def _spread_all_liquids(self):
+        if self.liquids_settled:
+            return
+
         water_new_positions = self._calculate_liquid_spread(self.water)
         lava_new_positions = self._calculate_liquid_spread(self.lava)
         
         collision_positions = water_new_positions & lava_new_positions
+
+        if (self.LIQUID_FAST_PATH and not collision_positions and
+                all(self.water[row][col] for row, col in water_new_positions) and
+                all(self.lava[row][col] for row, col in lava_new_positions)):
+            self._settle_liquids()
+            return
+
         for row, col in collision_positions:
             self.grid[row][col] = WALL
             self.movable_blocks.add((row, col))
@@ -156,6 +185,32 @@ class GameEngine:
         for row, col in lava_new_positions:
             self.lava[row][col] = True
     
+    def _settle_liquids(self):
+        # Nothing spread this turn. Liquids stay put until the grid next to
+        # them changes: a timed block expiring, a block pushed away or a
+        # purple collected. Timed blocks touching liquid would expire into
+        # flow, so the fixed point only counts once none are left.
+        for row, col in self.timed_blocks:
+            if self._is_near_liquid(row, col):
+                return
+        self.liquids_settled = True
+        self._goal_distances = None
+
+    def _unsettle_if_near_liquid(self, row, col):
+        if self._is_near_liquid(row, col):
+            self.liquids_settled = False
+            self._liquid_key = None
+            self._goal_distances = None
+
+    def _is_near_liquid(self, row, col):
+        for delta_row, delta_col in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            new_row = row + delta_row
+            new_col = col + delta_col
+            if (self.is_position_valid(new_row, new_col) and
+                    (self.water[new_row][new_col] or self.lava[new_row][new_col])):
+                return True
+        return False
+
     def _calculate_liquid_spread(self, liquid_grid):
         current_positions = []
         for row in range(self.height):
@@ -187,15 +242,18 @@ class GameEngine:
             self.won = False
 
     def copy(self):
-        new_game = GameEngine.__new__(GameEngine)
+        new_game = type(self).__new__(type(self))
 
         new_game.width = self.width
         new_game.height = self.height
-        new_game.grid = copy.deepcopy(self.grid)
-        new_game.water = copy.deepcopy(self.water)
-        new_game.lava = copy.deepcopy(self.lava)
-        new_game.timed_blocks = copy.deepcopy(self.timed_blocks)
-        new_game.movable_blocks = copy.deepcopy(self.movable_blocks)
+        # Cells are immutable strings and bools, so copying the rows is as
+        # deep as the copy needs to go; only TimedBlock counts down in place.
+        new_game.grid = [row[:] for row in self.grid]
+        new_game.water = [row[:] for row in self.water]
+        new_game.lava = [row[:] for row in self.lava]
+        new_game.timed_blocks = {pos: TimedBlock(block.turns_remaining)
+                                 for pos, block in self.timed_blocks.items()}
+        new_game.movable_blocks = set(self.movable_blocks)
 
         new_game.player_pos = self.player_pos
         new_game.goal_pos = self.goal_pos
@@ -206,17 +264,33 @@ class GameEngine:
         new_game.game_over = self.game_over
         new_game.won = self.won
 
+        new_game.liquids_settled = self.liquids_settled
+        new_game._liquid_key = self._liquid_key
+        new_game._goal_distances = self._goal_distances
+
         return new_game
 
+    def get_liquid_key(self):
+        # Settled liquids only change when a pushed block displaces them, so
+        # the tuples are built once and shared by every copy.
+        if self._liquid_key is not None:
+            return self._liquid_key
+        liquid_key = (tuple(tuple(row) for row in self.water),
+                      tuple(tuple(row) for row in self.lava))
+        if self.liquids_settled:
+            self._liquid_key = liquid_key
+        return liquid_key
+
     def get_state_tuple(self):
+        water_key, lava_key = self.get_liquid_key()
         return (
             self.player_pos,
             self.purple_collected,
             tuple(tuple(row) for row in self.grid),
-            tuple(tuple(row) for row in self.water),
-            tuple(tuple(row) for row in self.lava),
-            tuple((pos, block.turns_remaining) for pos, block in self.timed_blocks.items()),
-            tuple(self.movable_blocks),
+            water_key,
+            lava_key,
+            frozenset((pos, block.turns_remaining) for pos, block in self.timed_blocks.items()),
+            frozenset(self.movable_blocks),
             self.goal_pos,
             self.purple_total,
             self.game_over,
@@ -291,7 +365,47 @@ class GameEngine:
         return count
     
 
+    def goal_distance(self):
+        # Grid-BFS steps to the goal through everything but walls and
+        # barriers. Walls only appear where liquids collide, so while the
+        # liquids are settled the distance map is fixed and shared by copies.
+        if self.goal_pos is None:
+            return None
+        distances = self._goal_distances
+        if distances is None:
+            distances = self.distance_map([self.goal_pos])
+            if self.liquids_settled:
+                self._goal_distances = distances
+        row, col = self.player_pos
+        return distances[row][col]
+
+    def distance_map(self, targets):
+        # Multi-source grid BFS from the targets through everything but walls
+        # and barriers; None marks cells the targets cannot reach.
+        distances = [[None for _ in range(self.width)] for _ in range(self.height)]
+        queue = deque()
+        for row, col in targets:
+            distances[row][col] = 0
+            queue.append((row, col))
+        while queue:
+            row, col = queue.popleft()
+            for delta_row, delta_col in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                new_row = row + delta_row
+                new_col = col + delta_col
+                if (self.is_position_valid(new_row, new_col) and
+                        distances[new_row][new_col] is None and
+                        self.grid[new_row][new_col] not in [WALL, BARRIER]):
+                    distances[new_row][new_col] = distances[row][col] + 1
+                    queue.append((new_row, new_col))
+        return distances
+
     def heuristic(self):
+        if self.liquids_settled:
+            distance = self.goal_distance()
+            if distance is not None:
+                return distance
+            if self.goal_pos is not None:
+                return self.width * self.height
         
         deltaX , deltaY =self.player_pos[0] - self.goal_pos[0],self.player_pos[1] - self.goal_pos[1]
         return abs(deltaX) + abs(deltaY)
\ No newline at end of file
@@ -1,10 +1,14 @@
 import game_engine
+import batch_engine
+import macro_moves
+from config import *
 from collections import deque 
 import heapq
 import time
 import math
+import random
 
-def BFS(gameEngine):
+def BFS(gameEngine, telemetry=None):
     counter = 0
     start_time = time.time()  
     iniState = gameEngine.copy()
@@ -17,6 +21,8 @@ def BFS(gameEngine):
         counter += 1
         currentState, moves_so_far = gameStatesQueue.popleft()
         availableMoves = currentState.get_valid_moves()
+        if telemetry is not None:
+            telemetry.record_expansion(len(gameStatesQueue), len(availableMoves))
         if len(GeneratedStates) >= 150000 :
                 print('overload')
                 break
@@ -42,7 +48,7 @@ def BFS(gameEngine):
     print(f"no solution found after searching in {len(GeneratedStates)} state within {elapsed_time:.4f} seconds")
     return  []  
 
-def DFS(gameEngine):
+def DFS(gameEngine, telemetry=None):
     counter = 0
     start_time = time.time()  
     iniState = gameEngine.copy()
@@ -55,6 +61,8 @@ def DFS(gameEngine):
         counter += 1
         currentState, moves_so_far = gameStatesQueue.pop()
         availableMoves = currentState.get_valid_moves()
+        if telemetry is not None:
+            telemetry.record_expansion(len(gameStatesQueue), len(availableMoves))
         if len(GeneratedStates) >= 150000 :
                 print('overload')
                 break
@@ -82,7 +90,7 @@ def DFS(gameEngine):
 def _calculate_penalty(state, moves_so_far):
     return len(moves_so_far) + state.number_of_lava_block()*2 + math.floor(state.number_of_water_block()*1.5) + (state.purple_total - state.purple_collected)*5
 
-def UCS(gameEngine):
+def UCS(gameEngine, telemetry=None):
     counter = 0
     start_time = time.time()  
     iniState = gameEngine.copy()
@@ -91,10 +99,12 @@ def UCS(gameEngine):
     heapq.heappush(gameStatesQueue ,(_calculate_penalty(iniState,[]) , iniState , []))  
     GeneratedStates.add(iniState)
     
-    while heapq:
+    while gameStatesQueue:
         counter += 1
         penalty ,currentState, moves_so_far = heapq.heappop(gameStatesQueue)
         availableMoves = currentState.get_valid_moves()
+        if telemetry is not None:
+            telemetry.record_expansion(len(gameStatesQueue), len(availableMoves))
         if len(GeneratedStates) >= 150000 :
                 print('overload')
                 break
@@ -121,7 +131,7 @@ def UCS(gameEngine):
     return  []  
 def a_star_priority(state, moves_so_far):
     return len(moves_so_far) + state.heuristic()
-def A_star(gameEngine):
+def A_star(gameEngine, telemetry=None):
     counter = 0
     start_time = time.time()  
     iniState = gameEngine.copy()
@@ -130,10 +140,12 @@ def A_star(gameEngine):
     heapq.heappush(gameStatesQueue ,(a_star_priority(iniState,[]) , iniState , []))  
     GeneratedStates.add(iniState)
     
-    while heapq:
+    while gameStatesQueue:
         counter += 1
         penalty ,currentState, moves_so_far = heapq.heappop(gameStatesQueue)
         availableMoves = currentState.get_valid_moves()
+        if telemetry is not None:
+            telemetry.record_expansion(len(gameStatesQueue), len(availableMoves))
         if len(GeneratedStates) >= 150000 :
                 print('overload')
                 break
@@ -158,3 +170,314 @@ def A_star(gameEngine):
     elapsed_time = end_time - start_time
     print(f"no solution found after searching in {len(GeneratedStates)} state within {elapsed_time:.4f} seconds")
     return  []  
+
+
+# Default beam_search budget in expanded states times board cells, so a
+# run stays bounded like BFS's 150000-state cap: about a million states on
+# the shipped levels, 20000 on a 100x100 board.
+BEAM_CELL_BUDGET = 200000000
+
+def _beam_node_budget(gameEngine, node_budget):
+    if node_budget is None:
+        return max(1, BEAM_CELL_BUDGET // (gameEngine.width * gameEngine.height))
+    return node_budget
+
+def _unwind_path(path):
+    moves = []
+    while path is not None:
+        move, path = path
+        moves.append(move)
+    moves.reverse()
+    return moves
+
+def _purple_positions(state):
+    positions = []
+    for row in range(state.height):
+        for col in range(state.width):
+            if state.grid[row][col] == PURPLE:
+                positions.append((row, col))
+    return tuple(positions)
+
+# Folds every tile the player can walk over onto EMPTY for the layout keys.
+_BLOCKING_LAYOUT = str.maketrans({tile: EMPTY for tile in (MOVABLE, TIMED, PURPLE, GOAL)})
+
+def _beam_scores(children, parent_indices, distance_maps):
+    # Scores a whole layer at once. Children of one parent that collected no
+    # purple share its purple layout, so each layout is scanned once per
+    # layer, and its distance map is reused across layers via distance_maps.
+    # Maps are keyed by the wall/barrier layout too: water meeting lava
+    # builds walls, and a block pushed across a flooded barrier clears it.
+    layouts = {}
+    scores = []
+    for state, parent_index in zip(children, parent_indices):
+        remaining = state.purple_total - state.purple_collected
+        if remaining == 0:
+            targets = (state.goal_pos,) if state.goal_pos is not None else ()
+        else:
+            key = (parent_index, state.purple_collected)
+            if key not in layouts:
+                layouts[key] = _purple_positions(state)
+            targets = layouts[key]
+        map_key = (targets, tuple(''.join(row).translate(_BLOCKING_LAYOUT) for row in state.grid))
+        if map_key not in distance_maps:
+            distance_maps[map_key] = state.distance_map(targets)
+        row, col = state.player_pos
+        distance = distance_maps[map_key][row][col]
+        if distance is None:
+            distance = state.width * state.height
+        scores.append(distance + remaining * state.width * state.height)
+    return scores
+
+def _select_beam(scored, width, diversity):
+    # At most `diversity` states per player cell, so the beam does not fill
+    # up with near-identical positions; leftovers fill any free slots.
+    beam = []
+    overflow = []
+    per_cell = {}
+    for entry in scored:
+        cell = entry[-1].player_pos
+        if diversity and per_cell.get(cell, 0) >= diversity:
+            overflow.append(entry)
+            continue
+        per_cell[cell] = per_cell.get(cell, 0) + 1
+        beam.append(entry)
+        if len(beam) == width:
+            return beam
+    return beam + overflow[:width - len(beam)]
+
+def beam_search(gameEngine, width=64, max_depth=None, restarts=6, diversity=2, noise=0.0, seed=0, node_budget=None, telemetry=None, batch=False):
+    if batch:
+        return batch_beam_search(gameEngine, width, max_depth, restarts, diversity, noise, seed, node_budget, telemetry)
+    start_time = time.time()
+    rng = random.Random(seed)
+    if max_depth is None:
+        max_depth = gameEngine.width * gameEngine.height
+    node_budget = _beam_node_budget(gameEngine, node_budget)
+    counter = 0
+
+    for attempt in range(restarts + 1):
+        # The first beam is greedy. A beam that dies out or runs past
+        # max_depth restarts twice as wide; the liquid races in the shipped
+        # levels are won by keeping more states, not by shuffling them, so
+        # score jitter is off unless noise is given.
+        jitter = noise if attempt else 0.0
+        beam_width = width * 2 ** attempt
+        beam = [(gameEngine.copy(), None)]
+        visited = {hash(beam[0][0])}
+        distance_maps = {}
+
+        for _ in range(max_depth):
+            if counter >= node_budget:
+                break
+            children = []
+            parent_indices = []
+            paths = []
+            for parent_index, (currentState, path) in enumerate(beam):
+                counter += 1
+                availableMoves = currentState.get_valid_moves()
+                if telemetry is not None:
+                    telemetry.record_expansion(len(beam), len(availableMoves))
+                for move in availableMoves:
+                    newState = currentState.copy()
+                    newState.try_move_player(move)
+                    if newState.game_over:
+                        if newState.won:
+                            moves = _unwind_path((move, path))
+                            elapsed_time = time.time() - start_time
+                            print(f"solution found by beam search (width {beam_width}, restart {attempt}) within {elapsed_time:.4f} seconds")
+                            print(f"Visited  state {counter}")
+                            print(f"solution len {len(moves)}")
+                            return moves
+                        continue
+                    state_hash = hash(newState)
+                    if state_hash in visited:
+                        continue
+                    visited.add(state_hash)
+                    children.append(newState)
+                    parent_indices.append(parent_index)
+                    paths.append((move, path))
+
+            if not children:
+                break
+
+            scores = _beam_scores(children, parent_indices, distance_maps)
+            scored = [(score + rng.random() * jitter, index, paths[index], children[index])
+                      for index, score in enumerate(scores)]
+            scored.sort(key=lambda entry: entry[:2])
+            beam = [(state, path) for _, _, path, state in _select_beam(scored, beam_width, diversity)]
+
+        if counter >= node_budget:
+            print('overload')
+            break
+
+    elapsed_time = time.time() - start_time
+    print(f"no solution found by beam search (up to width {beam_width}) within {elapsed_time:.4f} seconds")
+    return []
+
+def _unwind_layers(history, index):
+    # history[k] holds (parent index, direction index) arrays for layer k+1.
+    moves = []
+    for parents, directions in reversed(history):
+        moves.append(batch_engine.DIRECTIONS[directions[index]])
+        index = parents[index]
+    moves.reverse()
+    return moves
+
+def _record_layer(telemetry, frontier_size, parents, parent_count):
+    for child_count in batch_engine.np.bincount(parents, minlength=parent_count):
+        telemetry.record_expansion(frontier_size, int(child_count))
+
+def batch_BFS(gameEngine, telemetry=None):
+    start_time = time.time()
+    layer = batch_engine.BatchState.from_engines([gameEngine])
+    GeneratedStates = set(layer.keys())
+    history = []
+    counter = 0
+
+    while len(layer):
+        counter += len(layer)
+        children, parents, directions, keys = layer.expand()
+        if telemetry is not None:
+            _record_layer(telemetry, len(layer), parents, len(layer))
+
+        won = batch_engine.np.nonzero(children.won)[0]
+        if len(won):
+            moves = _unwind_layers(history + [(parents, directions)], won[0])
+            elapsed_time = time.time() - start_time
+            print(f"solution found after searching in {len(GeneratedStates)} state within {elapsed_time:.4f} seconds")
+            print(f"Visited  state {counter}")
+            print(f"solution len {len(moves)}")
+            return moves
+
+        keep = []
+        for index in batch_engine.np.nonzero(~children.game_over)[0]:
+            if len(GeneratedStates) >= 150000 :
+                break
+            if keys[index] not in GeneratedStates:
+                GeneratedStates.add(keys[index])
+                keep.append(index)
+        if len(GeneratedStates) >= 150000 :
+                print('overload')
+                break
+        history.append((parents[keep], directions[keep]))
+        layer = children.take(keep)
+
+    elapsed_time = time.time() - start_time
+    print(f"no solution found after searching in {len(GeneratedStates)} state within {elapsed_time:.4f} seconds")
+    return []
+
+def batch_beam_search(gameEngine, width=64, max_depth=None, restarts=6, diversity=2, noise=0.0, seed=0, node_budget=None, telemetry=None):
+    np = batch_engine.np
+    start_time = time.time()
+    rng = random.Random(seed)
+    if max_depth is None:
+        max_depth = gameEngine.width * gameEngine.height
+    area = gameEngine.width * gameEngine.height
+    node_budget = _beam_node_budget(gameEngine, node_budget)
+    counter = 0
+
+    for attempt in range(restarts + 1):
+        jitter = noise if attempt else 0.0
+        beam_width = width * 2 ** attempt
+        beam = batch_engine.BatchState.from_engines([gameEngine])
+        visited = {hash(key) for key in beam.keys()}
+        history = []
+
+        for _ in range(max_depth):
+            if counter >= node_budget:
+                break
+            counter += len(beam)
+            children, parents, directions, keys = beam.expand()
+            if telemetry is not None:
+                _record_layer(telemetry, len(beam), parents, len(beam))
+
+            won = np.nonzero(children.won)[0]
+            if len(won):
+                moves = _unwind_layers(history + [(parents, directions)], won[0])
+                elapsed_time = time.time() - start_time
+                print(f"solution found by beam search (width {beam_width}, restart {attempt}) within {elapsed_time:.4f} seconds")
+                print(f"Visited  state {counter}")
+                print(f"solution len {len(moves)}")
+                return moves
+
+            fresh = []
+            for index in np.nonzero(~children.game_over)[0]:
+                key_hash = hash(keys[index])
+                if key_hash not in visited:
+                    visited.add(key_hash)
+                    fresh.append(index)
+            if not fresh:
+                break
+            fresh = np.array(fresh)
+            children = children.take(fresh)
+            parents = parents[fresh]
+            directions = directions[fresh]
+
+            remaining = children.purple_total - children.purple_collected
+            scores = children.target_distances() + remaining * area
+            scores = scores + np.array([rng.random() * jitter for _ in range(len(children))])
+            order = np.lexsort((np.arange(len(children)), scores))
+
+            # Same per-cell diversity cap as beam_search.
+            selected = []
+            overflow = []
+            per_cell = {}
+            for index in order:
+                cell = (int(children.player[index, 0]), int(children.player[index, 1]))
+                if diversity and per_cell.get(cell, 0) >= diversity:
+                    overflow.append(index)
+                    continue
+                per_cell[cell] = per_cell.get(cell, 0) + 1
+                selected.append(index)
+                if len(selected) == beam_width:
+                    break
+            selected = np.array(selected + overflow[:beam_width - len(selected)])
+
+            history.append((parents[selected], directions[selected]))
+            beam = children.take(selected)
+
+        if counter >= node_budget:
+            print('overload')
+            break
+
+    elapsed_time = time.time() - start_time
+    print(f"no solution found by beam search (up to width {beam_width}) within {elapsed_time:.4f} seconds")
+    return []
+
+def macro_A_star(gameEngine, telemetry=None):
+    # A_star over macro moves: each edge walks to a purple, the open goal or
+    # a block push, and costs the number of single steps it takes.
+    counter = 0
+    start_time = time.time()
+    iniState = gameEngine.copy()
+    GeneratedStates = set()
+    gameStatesQueue = []
+    heapq.heappush(gameStatesQueue ,(a_star_priority(iniState,[]) , iniState , []))
+    GeneratedStates.add(iniState)
+
+    while gameStatesQueue:
+        counter += 1
+        penalty ,currentState, moves_so_far = heapq.heappop(gameStatesQueue)
+        successors = macro_moves.macro_successors(currentState)
+        if telemetry is not None:
+            telemetry.record_expansion(len(gameStatesQueue), len(successors))
+        if len(GeneratedStates) >= 150000 :
+                print('overload')
+                break
+        for newState, macro in successors:
+            if newState.won:
+                moves = moves_so_far + macro
+                end_time = time.time()
+                elapsed_time = end_time - start_time
+                print(f"solution found after searching in {len(GeneratedStates)} state within {elapsed_time:.4f} seconds")
+                print(f"Visited  state {counter}")
+                print(f"solution len {len(moves)}")
+                return moves
+            if newState not in GeneratedStates:
+                new_moves_path = moves_so_far + macro
+                heapq.heappush(gameStatesQueue,(a_star_priority(newState,new_moves_path),newState, new_moves_path))
+                GeneratedStates.add(newState)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+    print(f"no solution found after searching in {len(GeneratedStates)} state within {elapsed_time:.4f} seconds")
+    return  []
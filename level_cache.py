@@ -0,0 +1,127 @@
+import hashlib
+import mmap
+import os
+import struct
+from config import *
+from game_objects import TimedBlock
+
+
+CACHE_DIR_NAME = '.level_cache'
+CACHE_EXTENSION = '.lvlc'
+
+MAGIC = b'LVLC'
+FORMAT_VERSION = 2
+
+# A compiled level is the header, three width*height byte layers (tiles, water,
+# lava), the timed-block table and the movable-block table. Files are named by
+# the sha256 of the level text, so editing a level simply misses the cache.
+#
+# magic, version, width, height, player row/col, goal row/col, purple_total,
+# timed count, movable count
+HEADER = struct.Struct('<4sHHHiiiiIII')
+# row, col, turns_remaining
+TIMED_ENTRY = struct.Struct('<HHi')
+# row, col
+MOVABLE_ENTRY = struct.Struct('<HH')
+
+
+class LevelCache:
+
+    @staticmethod
+    def cache_path(map_file, raw):
+        directory = os.path.join(os.path.dirname(os.path.abspath(map_file)), CACHE_DIR_NAME)
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+        return os.path.join(directory, digest + CACHE_EXTENSION)
+
+    @staticmethod
+    def load(map_file, raw):
+        path = LevelCache.cache_path(map_file, raw)
+        try:
+            with open(path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+                    return LevelCache.decode(blob)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    @staticmethod
+    def store(map_file, raw, map_data):
+        try:
+            blob = LevelCache.encode(map_data)
+        except (UnicodeEncodeError, struct.error):
+            return None
+
+        path = LevelCache.cache_path(map_file, raw)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        return path
+
+    @staticmethod
+    def encode(map_data):
+        width = map_data['width']
+        height = map_data['height']
+        player_row, player_col = map_data['player_pos']
+        goal_row, goal_col = map_data['goal_pos'] if map_data['goal_pos'] is not None else (-1, -1)
+        timed_blocks = map_data['timed_blocks']
+        movable_blocks = sorted(map_data['movable_blocks'])
+
+        parts = [HEADER.pack(MAGIC, FORMAT_VERSION, width, height,
+                             player_row, player_col, goal_row, goal_col,
+                             map_data['purple_total'], len(timed_blocks), len(movable_blocks))]
+        parts.append(''.join(''.join(row) for row in map_data['grid']).encode('latin-1'))
+        parts.append(bytes(cell for row in map_data['water'] for cell in row))
+        parts.append(bytes(cell for row in map_data['lava'] for cell in row))
+        for (row, col), block in timed_blocks.items():
+            parts.append(TIMED_ENTRY.pack(row, col, block.turns_remaining))
+        for row, col in movable_blocks:
+            parts.append(MOVABLE_ENTRY.pack(row, col))
+
+        return b''.join(parts)
+
+    @staticmethod
+    def decode(blob):
+        (magic, version, width, height, player_row, player_col, goal_row, goal_col,
+         purple_total, timed_count, movable_count) = HEADER.unpack_from(blob, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Not a compiled level of this version")
+
+        size = width * height
+        timed_size = timed_count * TIMED_ENTRY.size
+        movable_size = movable_count * MOVABLE_ENTRY.size
+        if len(blob) != HEADER.size + 3 * size + timed_size + movable_size:
+            raise ValueError("Truncated compiled level")
+
+        # Rows are sliced out of whole layers; the byte layers become bools
+        # through a '?' memoryview, so no Python code runs per cell.
+        offset = HEADER.size
+        tiles = blob[offset:offset + size].decode('latin-1')
+        offset += size
+        water = memoryview(blob[offset:offset + size]).cast('?').tolist()
+        offset += size
+        lava = memoryview(blob[offset:offset + size]).cast('?').tolist()
+        offset += size
+        timed_table = blob[offset:offset + timed_size]
+        offset += timed_size
+        movable_table = blob[offset:offset + movable_size]
+
+        rows = range(0, size, width)
+        return {
+            'width': width,
+            'height': height,
+            'grid': [list(tiles[start:start + width]) for start in rows],
+            'water': [water[start:start + width] for start in rows],
+            'lava': [lava[start:start + width] for start in rows],
+            'timed_blocks': {(row, col): TimedBlock(turns)
+                             for row, col, turns in TIMED_ENTRY.iter_unpack(timed_table)},
+            'player_pos': (player_row, player_col),
+            'goal_pos': (goal_row, goal_col) if goal_row >= 0 else None,
+            'purple_total': purple_total,
+            'movable_blocks': set(MOVABLE_ENTRY.iter_unpack(movable_table))
+        }
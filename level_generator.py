@@ -0,0 +1,167 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+from collections import deque
+from config import *
+from game_engine import GameEngine
+from map_loader import MapLoader
+import intelligent_search_engine
+
+
+class LevelGenerator:
+
+    def __init__(self, width=16, height=10, wall_density=0.15,
+                 water_sources=1, lava_sources=1, movable_blocks=2,
+                 purples=1, timed_blocks=0, timed_turns=(5, 30), seed=None):
+        if width < 5 or height < 5:
+            raise ValueError("Levels must be at least 5x5")
+        if not 0 <= wall_density < 1:
+            raise ValueError("wall_density must be in [0, 1)")
+
+        self.width = width
+        self.height = height
+        self.wall_density = wall_density
+        self.water_sources = water_sources
+        self.lava_sources = lava_sources
+        self.movable_blocks = movable_blocks
+        self.purples = purples
+        self.timed_blocks = timed_blocks
+        self.timed_turns = timed_turns
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def generate(self, max_attempts=100):
+        for _ in range(max_attempts):
+            tiles = self._try_layout()
+            if tiles is not None:
+                return self.to_text(tiles)
+        raise ValueError("Could not place every object; lower wall_density or object counts")
+
+    def generate_solvable(self, solver=intelligent_search_engine.A_star, max_attempts=20):
+        for _ in range(max_attempts):
+            text = self.generate()
+            game = GameEngine.from_map_data(MapLoader.load_from_string(text))
+            with contextlib.redirect_stdout(io.StringIO()):
+                moves = solver(game)
+            if moves:
+                return text, moves
+        return None, []
+
+    @staticmethod
+    def to_text(tiles):
+        return '\n'.join(''.join(row) for row in tiles) + '\n'
+
+    def _try_layout(self):
+        tiles = [[WALL for _ in range(self.width)] for _ in range(self.height)]
+        interior = []
+        for row in range(1, self.height - 1):
+            for col in range(1, self.width - 1):
+                if self.rng.random() >= self.wall_density:
+                    tiles[row][col] = EMPTY
+                    interior.append((row, col))
+
+        if not interior:
+            return None
+
+        player_pos = self.rng.choice(interior)
+        region = self._reachable_cells(tiles, player_pos)
+        region.remove(player_pos)
+
+        objects_needed = (1 + self.purples + self.movable_blocks + self.timed_blocks +
+                          self.water_sources + self.lava_sources)
+        if len(region) < objects_needed:
+            return None
+
+        self.rng.shuffle(region)
+        # Liquid sources right next to the start would end the level on the first move.
+        far_cells = [pos for pos in region if self._distance(pos, player_pos) > 2]
+        near_cells = [pos for pos in region if self._distance(pos, player_pos) <= 2]
+        liquid_count = self.water_sources + self.lava_sources
+        if len(far_cells) < liquid_count:
+            return None
+
+        liquid_cells = far_cells[:liquid_count]
+        other_cells = far_cells[liquid_count:] + near_cells
+        self.rng.shuffle(other_cells)
+
+        row, col = player_pos
+        tiles[row][col] = PLAYER
+
+        for index, (row, col) in enumerate(liquid_cells):
+            tiles[row][col] = WATER if index < self.water_sources else LAVA
+
+        cells = iter(other_cells)
+        row, col = next(cells)
+        tiles[row][col] = GOAL
+        for _ in range(self.purples):
+            row, col = next(cells)
+            tiles[row][col] = PURPLE
+        for _ in range(self.movable_blocks):
+            row, col = next(cells)
+            tiles[row][col] = MOVABLE
+        for _ in range(self.timed_blocks):
+            row, col = next(cells)
+            tiles[row][col] = f"{TIMED}:{self.rng.randint(*self.timed_turns)}"
+
+        return tiles
+
+    def _reachable_cells(self, tiles, start):
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            row, col = queue.popleft()
+            for delta_row, delta_col in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                pos = (row + delta_row, col + delta_col)
+                if pos not in seen and tiles[pos[0]][pos[1]] == EMPTY:
+                    seen.add(pos)
+                    queue.append(pos)
+        return sorted(seen)
+
+    @staticmethod
+    def _distance(a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate random levels in the MapLoader text format")
+    parser.add_argument('--width', type=int, default=16)
+    parser.add_argument('--height', type=int, default=10)
+    parser.add_argument('--wall-density', type=float, default=0.15)
+    parser.add_argument('--water', type=int, default=1, help="number of water sources")
+    parser.add_argument('--lava', type=int, default=1, help="number of lava sources")
+    parser.add_argument('--movable', type=int, default=2, help="number of movable blocks")
+    parser.add_argument('--purples', type=int, default=1)
+    parser.add_argument('--timed', type=int, default=0, help="number of T:NN timed blocks")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--count', type=int, default=1)
+    parser.add_argument('--solver', default=None,
+                        help="keep only levels this intelligent_search_engine solver can solve, e.g. A_star")
+    parser.add_argument('--out-dir', default='generated_levels')
+    args = parser.parse_args()
+
+    solver = getattr(intelligent_search_engine, args.solver) if args.solver else None
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    for index in range(args.count):
+        seed = args.seed + index
+        generator = LevelGenerator(args.width, args.height, args.wall_density,
+                                   args.water, args.lava, args.movable,
+                                   args.purples, args.timed, seed=seed)
+        if solver is None:
+            text = generator.generate()
+        else:
+            text, moves = generator.generate_solvable(solver)
+            if text is None:
+                print(f"seed {seed}: no solvable level found")
+                continue
+
+        path = os.path.join(args.out_dir, f"gen_{args.width}x{args.height}_s{seed}.txt")
+        with open(path, 'w') as f:
+            f.write(text)
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from collections import deque
+from config import *
+
+
+DIRECTIONS = ['right', 'down', 'left', 'up']
+DELTAS = {'right': (0, 1), 'down': (1, 0), 'left': (0, -1), 'up': (-1, 0)}
+
+
+class LiquidTimeline:
+    # The board after 0, 1, 2, ... turns of plain walking. Walking never
+    # changes the grid, timers or liquids, so one timeline serves every
+    # path; it stops growing once the board can no longer change.
+
+    def __init__(self, state):
+        first = state.copy()
+        first.game_over = False
+        self.frames = [first]
+        self.static_from = None
+        self._update_static()
+
+    def _update_static(self):
+        frame = self.frames[-1]
+        if frame.timed_blocks:
+            return
+        if len(self.frames) > 1:
+            previous = self.frames[-2]
+            if (frame.grid == previous.grid and frame.water == previous.water and
+                    frame.lava == previous.lava):
+                self.static_from = len(self.frames) - 2
+                self.frames.pop()
+
+    def frame(self, turn):
+        if self.static_from is not None and turn >= self.static_from:
+            return self.frames[self.static_from]
+        while len(self.frames) <= turn:
+            frame = self.frames[-1].copy()
+            frame.move_count += 1
+            frame._update_timed_blocks()
+            frame._spread_all_liquids()
+            self.frames.append(frame)
+            self._update_static()
+            if self.static_from is not None:
+                return self.frames[self.static_from]
+        return self.frames[turn]
+
+    def time_key(self, turn):
+        if self.static_from is not None and turn >= self.static_from:
+            return self.static_from
+        return turn
+
+
+def _push_open(board, row, col):
+    # The test GameEngine._try_push_block makes, without copying the board.
+    if not board.is_position_valid(row, col):
+        return False
+    return board.grid[row][col] == EMPTY or board.water[row][col] or board.lava[row][col]
+
+
+def macro_successors(state, max_steps=None):
+    # One successor per reachable event: entering a purple, entering the
+    # unlocked goal, or pushing a block in a given direction. Each is reached
+    # by the shortest safe walk through the evolving liquids and returned as
+    # (resulting state, moves). Plain walking in between is not a successor.
+    if state.game_over:
+        return []
+    if max_steps is None:
+        max_steps = state.width * state.height
+
+    timeline = LiquidTimeline(state)
+    goal_open = state.purple_collected >= state.purple_total
+    start = state.player_pos
+    seen = {(start, 0)}
+    queue = deque([(start, 0, [])])
+    targets = set()
+    successors = []
+
+    while queue:
+        (row, col), turn, path = queue.popleft()
+        board = timeline.frame(turn)
+
+        for direction in DIRECTIONS:
+            delta_row, delta_col = DELTAS[direction]
+            new_row = row + delta_row
+            new_col = col + delta_col
+            if not board.is_position_valid(new_row, new_col):
+                continue
+            cell = board.grid[new_row][new_col]
+
+            if cell == MOVABLE or cell == PURPLE or (cell == GOAL and goal_open):
+                target = (new_row, new_col, direction if cell == MOVABLE else None)
+                if target in targets:
+                    continue
+                if cell == MOVABLE and not _push_open(board, new_row + delta_row, new_col + delta_col):
+                    continue
+                successor = board.copy()
+                successor.player_pos = (row, col)
+                successor.move_count = state.move_count + turn
+                before = successor.move_count
+                successor.try_move_player(direction)
+                # A blocked or deadly attempt may work on a later turn, once a
+                # timed block expires or the liquids move, so the target is
+                # only claimed by the first arrival that succeeds.
+                if successor.move_count == before:
+                    continue
+                if successor.game_over and not successor.won:
+                    continue
+                targets.add(target)
+                successors.append((successor, path + [direction]))
+                continue
+
+            if cell in [WALL, BARRIER, TIMED, GOAL] or turn >= max_steps:
+                continue
+
+            after = timeline.frame(turn + 1)
+            if after.lava[new_row][new_col] or after.grid[new_row][new_col] == WALL:
+                continue
+            key = ((new_row, new_col), timeline.time_key(turn + 1))
+            if key in seen:
+                continue
+            seen.add(key)
+            queue.append(((new_row, new_col), turn + 1, path + [direction]))
+
+    return successors
@@ -1,15 +1,41 @@
 
 from config import *
 from game_objects import TimedBlock
+from level_cache import LevelCache
 
 
 class MapLoader:
 
+    @staticmethod
+    def load(map_file, use_cache=True):
+        if not use_cache:
+            return MapLoader.load_from_file(map_file)
+
+        with open(map_file, 'rb') as f:
+            raw = f.read()
+
+        map_data = LevelCache.load(map_file, raw)
+        if map_data is not None:
+            return map_data
+
+        map_data = MapLoader.load_from_string(raw.decode())
+        LevelCache.store(map_file, raw, map_data)
+        return map_data
+
     @staticmethod
     def load_from_file(map_file):
 
         with open(map_file, 'r') as f:
             lines = f.readlines()
+
+        return MapLoader.parse_lines(lines)
+
+    @staticmethod
+    def load_from_string(text):
+        return MapLoader.parse_lines(text.splitlines())
+
+    @staticmethod
+    def parse_lines(lines):
         
         height = len(lines)
         
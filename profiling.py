@@ -0,0 +1,129 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+
+# Modules whose functions count as engine hot spots in the summary.
+ENGINE_FILES = ('game_engine.py', 'batch_engine.py', 'map_loader.py', 'intelligent_search_engine.py',
+                'game_objects.py', 'copy.py')
+
+
+class SamplingProfiler:
+    # Samples the profiled thread's Python stack from a background thread and
+    # aggregates them as collapsed stacks ("root;caller;callee count"), the
+    # input format of flamegraph.pl, inferno and speedscope.
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._switch_interval = None
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._stop.clear()
+        # The sampler only runs when it gets the GIL, so shorten the switch interval.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profile_call(function, *args, profiler='both', output_prefix=None, interval=0.001):
+    # Runs function(*args) under cProfile and/or the sampling profiler and
+    # writes <prefix>.pstats / <prefix>.collapsed. Returns the function's
+    # result, the profilers that ran and the paths written.
+    use_cprofile = profiler in ('cprofile', 'both')
+    use_sampler = profiler in ('sample', 'both')
+    paths = {}
+
+    if output_prefix:
+        directory = os.path.dirname(output_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    sampler = SamplingProfiler(interval) if use_sampler else None
+    tracer = cProfile.Profile() if use_cprofile else None
+
+    if sampler is not None:
+        sampler.start()
+    if tracer is not None:
+        tracer.enable()
+    try:
+        result = function(*args)
+    finally:
+        if tracer is not None:
+            tracer.disable()
+        if sampler is not None:
+            sampler.stop()
+
+    if tracer is not None and output_prefix:
+        paths['pstats'] = output_prefix + '.pstats'
+        tracer.dump_stats(paths['pstats'])
+    if sampler is not None and output_prefix:
+        paths['collapsed'] = output_prefix + '.collapsed'
+        sampler.write_collapsed(paths['collapsed'])
+
+    return result, tracer, sampler, paths
+
+
+def engine_hot_spots(tracer, limit=15):
+    # (cumulative s, own s, calls, "file:line(function)") for engine functions,
+    # slowest cumulative first.
+    stats = pstats.Stats(tracer)
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        if os.path.basename(filename) in ENGINE_FILES:
+            rows.append((cumulative, own, calls, f"{os.path.basename(filename)}:{line}({name})"))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def sampled_hot_spots(sampler, limit=15):
+    # Inclusive sample counts per frame, i.e. the width of each flamegraph tower.
+    totals = Counter()
+    for stack, count in sampler.stacks.items():
+        for frame in set(stack.split(';')):
+            totals[frame] += count
+    return totals.most_common(limit)
+
+
+def print_hot_spots(tracer=None, sampler=None, limit=15):
+    if tracer is not None:
+        print(f"{'cumulative':>11} {'own':>9} {'calls':>10}  function")
+        for cumulative, own, calls, label in engine_hot_spots(tracer, limit):
+            print(f"{cumulative:10.3f}s {own:8.3f}s {calls:10}  {label}")
+    if sampler is not None and sampler.samples:
+        print(f"{sampler.samples} samples")
+        for frame, count in sampled_hot_spots(sampler, limit):
+            print(f"{count / sampler.samples:10.1%}  {frame}")
+
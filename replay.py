@@ -0,0 +1,194 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from game_engine import GameEngine
+
+
+DIRECTIONS = ('up', 'down', 'left', 'right')
+SHORT_DIRECTIONS = {'u': 'up', 'd': 'down', 'l': 'left', 'r': 'right'}
+SOLUTION_EXTENSION = '.sol'
+
+
+class ReplayResult:
+
+    def __init__(self, level_file, moves):
+        self.level_file = level_file
+        self.total_moves = len(moves)
+        self.steps = 0
+        self.valid = False
+        self.won = False
+        self.failed_step = None
+        self.reason = None
+        self.player_pos = None
+        self.purple_collected = 0
+        self.purple_total = 0
+        self.game_over = False
+
+    def __str__(self):
+        status = 'OK' if self.valid else f"FAIL at step {self.failed_step}: {self.reason}"
+        return f"{self.level_file}: {status} ({self.steps}/{self.total_moves} steps)"
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+def parse_moves(text):
+    moves = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0]
+        for token in line.replace(',', ' ').split():
+            token = token.lower()
+            token = SHORT_DIRECTIONS.get(token, token)
+            if token not in DIRECTIONS:
+                raise ValueError(f"Unknown move '{token}'")
+            moves.append(token)
+    return moves
+
+
+def load_solution(path):
+    with open(path) as f:
+        return parse_moves(f.read())
+
+
+def save_solution(path, moves, level_file=None, algorithm=None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        if level_file is not None:
+            f.write(f"# level: {os.path.basename(level_file)}\n")
+        if algorithm is not None:
+            f.write(f"# algorithm: {algorithm}\n")
+        f.write(' '.join(moves) + '\n')
+
+
+def replay(level_file, moves, game=None):
+    # Applies the moves in place on one engine; try_move_player leaves
+    # move_count untouched when a move is blocked, which is how invalid
+    # moves are detected without copying or calling get_valid_moves.
+    if game is None:
+        game = GameEngine(level_file)
+    result = ReplayResult(level_file, moves)
+
+    for step, move in enumerate(moves, start=1):
+        if game.game_over:
+            result.failed_step = step
+            result.reason = 'moves left after the game ended'
+            break
+        before = game.move_count
+        game.try_move_player(move)
+        if game.move_count == before:
+            result.failed_step = step
+            result.reason = f"move '{move}' is blocked"
+            break
+        result.steps = step
+        if game.game_over and not game.won:
+            result.failed_step = step
+            result.reason = 'player died'
+            break
+    else:
+        if not game.won:
+            result.failed_step = len(moves)
+            result.reason = 'goal not reached'
+
+    result.won = game.won
+    result.valid = result.failed_step is None
+    result.player_pos = game.player_pos
+    result.purple_collected = game.purple_collected
+    result.purple_total = game.purple_total
+    result.game_over = game.game_over
+    return result
+
+
+def _replay_job(job):
+    # The solution is parsed here, so an unreadable or malformed one fails
+    # only its own job instead of the whole run.
+    level_file, solution = job
+    moves = []
+    try:
+        if isinstance(solution, str):
+            moves = load_solution(solution)
+        else:
+            moves = parse_moves('\n'.join(solution))
+        return replay(level_file, moves)
+    except (OSError, ValueError) as e:
+        result = ReplayResult(level_file, moves)
+        result.failed_step = 0
+        result.reason = str(e)
+        return result
+
+
+def verify_many(jobs, workers=None):
+    # jobs: list of (level_file, moves or solution file path). workers=1
+    # stays in this process.
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        return [_replay_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        return list(executor.map(_replay_job, jobs, chunksize=chunksize))
+
+
+def jobs_from_manifest(path):
+    # {"level2.txt": ["up", ...] or "solutions/level2.sol", ...}; relative
+    # paths are resolved against the manifest's directory.
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path) as f:
+        manifest = json.load(f)
+    jobs = []
+    for level_file, solution in manifest.items():
+        level_file = os.path.join(base, level_file)
+        if isinstance(solution, str):
+            solution = os.path.join(base, solution)
+        jobs.append((level_file, solution))
+    return jobs
+
+
+def jobs_from_directory(solution_dir, level_dir):
+    # solutions/level2.sol is checked against <level_dir>/level2.txt.
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(solution_dir, '*' + SOLUTION_EXTENSION))):
+        level_name = os.path.splitext(os.path.basename(path))[0] + '.txt'
+        jobs.append((os.path.join(level_dir, level_name), path))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay and verify stored solutions")
+    parser.add_argument('level_file', nargs='?')
+    parser.add_argument('solution', nargs='?', help="solution file, or '-' to read moves from stdin")
+    parser.add_argument('--manifest', help="JSON mapping level files to moves or solution files")
+    parser.add_argument('--dir', help="directory of <level>.sol files to verify")
+    parser.add_argument('--level-dir', default=os.path.dirname(os.path.abspath(__file__)),
+                        help="where --dir looks up the level files")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    if args.manifest:
+        jobs = jobs_from_manifest(args.manifest)
+    elif args.dir:
+        jobs = jobs_from_directory(args.dir, args.level_dir)
+    elif args.level_file and args.solution:
+        solution = sys.stdin.read().splitlines() if args.solution == '-' else args.solution
+        jobs = [(args.level_file, solution)]
+    else:
+        parser.error("give a level and a solution, --manifest or --dir")
+
+    start = time.perf_counter()
+    results = verify_many(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    for result in results:
+        print(result)
+    failures = sum(1 for result in results if not result.valid)
+    print(f"{len(results) - failures}/{len(results)} solutions valid in {elapsed:.3f} s")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
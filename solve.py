@@ -0,0 +1,76 @@
+import argparse
+import contextlib
+import functools
+import io
+import os
+import time
+from game_engine import GameEngine
+import intelligent_search_engine
+import profiling
+import replay
+
+
+ALGORITHMS = ['BFS', 'DFS', 'UCS', 'A_star', 'beam_search', 'batch_BFS', 'macro_A_star']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a level without opening the game window")
+    parser.add_argument('level_file')
+    parser.add_argument('--algorithm', default='A_star', choices=ALGORITHMS)
+    parser.add_argument('--beam-width', type=int, default=64, help="beam width for beam_search")
+    parser.add_argument('--restarts', type=int, default=6, help="beam_search restarts, each twice as wide")
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help="layers per beam_search restart (default width x height of the level)")
+    parser.add_argument('--node-budget', type=int, default=None,
+                        help="states beam_search may expand over all restarts (default 2e8 / board cells)")
+    parser.add_argument('--batch', action='store_true', help="expand beam_search layers with the NumPy batch engine")
+    parser.add_argument('--quiet', action='store_true', help="hide the solver's own progress output")
+    parser.add_argument('--save-solution', help="write the moves to this solution file for replay.py")
+    parser.add_argument('--profile', action='store_true',
+                        help="run the solver under a profiler and print the engine hot spots")
+    parser.add_argument('--profiler', default='both', choices=['cprofile', 'sample', 'both'])
+    parser.add_argument('--profile-out', default=None,
+                        help="output prefix for .pstats/.collapsed (default profiles/<level>_<algorithm>)")
+    parser.add_argument('--sample-interval', type=float, default=0.001, help="seconds between stack samples")
+    parser.add_argument('--top', type=int, default=15, help="number of hot spots to print")
+    args = parser.parse_args()
+
+    try:
+        game = GameEngine(args.level_file)
+    except FileNotFoundError:
+        print(f"Error: Level file '{args.level_file}' not found!")
+        return
+
+    solver = getattr(intelligent_search_engine, args.algorithm)
+    if args.algorithm == 'beam_search':
+        solver = functools.partial(solver, width=args.beam_width, max_depth=args.max_depth, restarts=args.restarts,
+                                   node_budget=args.node_budget, batch=args.batch)
+    output = io.StringIO() if args.quiet else None
+
+    with contextlib.redirect_stdout(output) if output is not None else contextlib.nullcontext():
+        start = time.perf_counter()
+        if args.profile:
+            prefix = args.profile_out
+            if prefix is None:
+                level_name = os.path.splitext(os.path.basename(args.level_file))[0]
+                prefix = os.path.join('profiles', f"{level_name}_{args.algorithm}")
+            moves, tracer, sampler, paths = profiling.profile_call(
+                solver, game, profiler=args.profiler, output_prefix=prefix,
+                interval=args.sample_interval)
+        else:
+            moves = solver(game)
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.algorithm} on {args.level_file}: {len(moves)} moves in {elapsed:.3f} s")
+    print(' '.join(moves))
+    if args.save_solution and moves:
+        replay.save_solution(args.save_solution, moves, args.level_file, args.algorithm)
+
+    if args.profile:
+        profiling.print_hot_spots(tracer, sampler, args.top)
+        for kind, path in paths.items():
+            print(f"wrote {kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import time
+from game_engine import GameEngine
+import intelligent_search_engine
+import solve
+
+
+logger = logging.getLogger(__name__)
+
+# phase name -> (owner, attribute) that gets wrapped while telemetry is enabled.
+# Timers are inclusive: try_move_player also contains its liquid spread and
+# priority the heuristic() calls it makes. A phase never wraps two functions
+# where one calls the other, so no call is counted twice.
+PHASES = {
+    'copy': [(GameEngine, 'copy')],
+    'hash': [(GameEngine, '__hash__')],
+    'eq': [(GameEngine, '__eq__')],
+    'get_valid_moves': [(GameEngine, 'get_valid_moves')],
+    'try_move_player': [(GameEngine, 'try_move_player')],
+    'liquid_spread': [(GameEngine, '_spread_all_liquids')],
+    'heuristic': [(GameEngine, 'heuristic')],
+    'priority': [(intelligent_search_engine, '_calculate_penalty'),
+                 (intelligent_search_engine, 'a_star_priority')],
+}
+
+
+class Telemetry:
+
+    def __init__(self, callback=None, log=False, frontier_sample_every=100):
+        self.callback = callback
+        self.log = log
+        self.frontier_sample_every = frontier_sample_every
+
+        self.counts = {phase: 0 for phase in PHASES}
+        self.times_ns = {phase: 0 for phase in PHASES}
+        self.expansions = 0
+        self.children = 0
+        self.max_frontier = 0
+        self.frontier_samples = []
+        self.wall_time = 0.0
+
+        self._originals = []
+        self._start = None
+
+    def enable(self):
+        if self._originals:
+            raise RuntimeError("Telemetry is already enabled")
+        for phase, targets in PHASES.items():
+            for owner, name in targets:
+                original = getattr(owner, name)
+                self._originals.append((owner, name, original))
+                setattr(owner, name, self._wrap(phase, original))
+        self._start = time.perf_counter()
+
+    def disable(self):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+        if self._start is not None:
+            self.wall_time += time.perf_counter() - self._start
+            self._start = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+        self.report()
+        return False
+
+    def _wrap(self, phase, original):
+        counts = self.counts
+        times_ns = self.times_ns
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                times_ns[phase] += perf_counter_ns() - start
+                counts[phase] += 1
+
+        timed.__name__ = getattr(original, '__name__', phase)
+        timed.__wrapped__ = original
+        return timed
+
+    def record_expansion(self, frontier_size, child_count):
+        self.expansions += 1
+        self.children += child_count
+        if frontier_size > self.max_frontier:
+            self.max_frontier = frontier_size
+        if (self.expansions - 1) % self.frontier_sample_every == 0:
+            self.frontier_samples.append((self.expansions, frontier_size))
+
+    def branching_factor(self):
+        return self.children / self.expansions if self.expansions else 0.0
+
+    def to_dict(self):
+        return {
+            'wall_time': self.wall_time,
+            'expansions': self.expansions,
+            'children': self.children,
+            'branching_factor': self.branching_factor(),
+            'max_frontier': self.max_frontier,
+            'frontier_samples': self.frontier_samples,
+            'phases': {
+                phase: {
+                    'calls': self.counts[phase],
+                    'total_time': self.times_ns[phase] / 1e9,
+                    'us_per_call': self.times_ns[phase] / self.counts[phase] / 1e3 if self.counts[phase] else 0.0,
+                }
+                for phase in PHASES
+            },
+        }
+
+    def report(self):
+        data = self.to_dict()
+        if self.callback is not None:
+            self.callback(data)
+        if self.log:
+            logger.info("search telemetry %s", json.dumps(data))
+        return data
+
+    def dump_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self):
+        lines = [f"wall time {self.wall_time:.3f} s, {self.expansions} expansions, "
+                 f"branching factor {self.branching_factor():.2f}, max frontier {self.max_frontier}"]
+        phases = sorted(PHASES, key=lambda phase: self.times_ns[phase], reverse=True)
+        for phase in phases:
+            lines.append(f"  {phase:16} {self.counts[phase]:10} calls {self.times_ns[phase] / 1e9:9.3f} s")
+        return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a solver with per-phase telemetry")
+    parser.add_argument('level_file')
+    parser.add_argument('--algorithm', default='A_star', choices=solve.ALGORITHMS)
+    parser.add_argument('--json', help="dump the telemetry to this JSON file")
+    parser.add_argument('--sample-every', type=int, default=100,
+                        help="record the frontier size every N expansions")
+    args = parser.parse_args()
+
+    solver = getattr(intelligent_search_engine, args.algorithm)
+    game = GameEngine(args.level_file)
+    telemetry = Telemetry(frontier_sample_every=args.sample_every)
+
+    with telemetry, contextlib.redirect_stdout(io.StringIO()):
+        moves = solver(game, telemetry=telemetry)
+
+    print(f"{args.algorithm} on {args.level_file}: solution len {len(moves)}")
+    print(telemetry.summary())
+    if args.json:
+        telemetry.dump_json(args.json)
+
+
+if __name__ == "__main__":
+    main()